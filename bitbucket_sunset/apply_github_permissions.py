@@ -1,26 +1,162 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import logging
-from typing import Dict, Iterable, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 from github import Github, GithubException
+from github.Repository import Repository
 
 from .utils import BITBUCKET_TO_GITHUB, GithubTarget, read_csv
 
 logger = logging.getLogger(__name__)
 
 
+class _Entry(NamedTuple):
+    """One effective permission row, normalized at load time."""
+
+    email: str  # stripped, lowercased
+    gh_perm: str  # pull/push/admin
+
+
 def load_email_to_login(mapping_csv: Optional[str]) -> Dict[str, str]:
-    mapping: Dict[str, str] = {}
     if not mapping_csv:
-        return mapping
-    for row in read_csv(mapping_csv):
-        email = (row.get("email") or "").strip().lower()
-        login = (row.get("github_login") or "").strip()
-        if email and login:
-            mapping[email] = login
-    return mapping
+        return {}
+    (email_i, login_i), rows = read_csv(mapping_csv, "email", "github_login")
+    pairs = ((row[email_i].strip().lower(), row[login_i].strip()) for row in rows)
+    return {email: login for email, login in pairs if email and login}
+
+
+# REST get_collaborator_permission values -> permission names accepted by add_to_collaborators
+_GH_API_TO_OUR_PERM = {
+    "admin": "admin",
+    "write": "push",
+    "triage": "triage",
+    "maintain": "maintain",
+    "read": "pull",
+}
+
+# GraphQL RepositoryPermission -> the same scale as the REST check above. The REST check reads
+# the legacy permission field, which reports maintain as write and triage as read, so mapping
+# MAINTAIN/TRIAGE the same way keeps direct maintainers and triagers from being downgraded to
+# push/pull, whichever path made the decision.
+_GRAPHQL_TO_OUR_PERM = {
+    "ADMIN": "admin",
+    "MAINTAIN": "push",
+    "WRITE": "push",
+    "TRIAGE": "pull",
+    "READ": "pull",
+}
+
+_COLLABORATORS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    collaborators(first: 100, after: $cursor) {
+      pageInfo { endCursor hasNextPage }
+      edges { permission node { login } }
+    }
+  }
+}
+"""
+
+
+def _fetch_repo_collaborators(gh: Github, org: str, repo: str) -> Optional[Dict[str, str]]:
+    """
+    Fetch all collaborators of a repo with one paginated GraphQL query.
+
+    Returns a mapping of lowercased login -> permission (admin/push/pull),
+    or None if the query fails so callers can fall back to per-user REST checks.
+    """
+    collaborators: Dict[str, str] = {}
+    cursor: Optional[str] = None
+    while True:
+        variables = {"owner": org, "name": repo, "cursor": cursor}
+        try:
+            # graphql_query resolves the endpoint from base_url (GHES included) and raises on "errors"
+            _, data = gh.requester.graphql_query(_COLLABORATORS_QUERY, variables)
+        except GithubException as e:
+            logger.warning("GraphQL collaborators query failed for %s/%s: %s", org, repo, e)
+            return None
+        conn = ((data.get("data") or {}).get("repository") or {}).get("collaborators") or {}
+        for edge in conn.get("edges") or []:
+            login = ((edge.get("node") or {}).get("login") or "").lower()
+            perm = edge.get("permission") or ""
+            if login:
+                collaborators[login] = _GRAPHQL_TO_OUR_PERM.get(perm, perm.lower())
+        page_info = conn.get("pageInfo") or {}
+        if not page_info.get("hasNextPage"):
+            break
+        cursor = page_info.get("endCursor")
+    return collaborators
+
+
+def _check_one(
+    get_repo: Callable[[], Repository],
+    full_name: str,
+    collaborators: Optional[Dict[str, str]],
+    e: _Entry,
+    email_to_login: Dict[str, str],
+    default_missing: Optional[str],
+    dry_run: bool,
+) -> Tuple[str, Optional[str]]:
+    """
+    Decide whether a single effective permission row needs a grant; returns (outcome, login).
+    An outcome of "grant" means the caller should add login with e.gh_perm.
+    Only reads from GitHub; get_repo must return a repo bound to the calling thread's client.
+    """
+    email, gh_perm = e
+
+    login = email_to_login.get(email)
+    if not login:
+        if default_missing:
+            login = default_missing
+            logger.warning("No mapping for %s; using default login %s", email, login)
+        else:
+            logger.warning("No mapping for %s; skipping", email)
+            return "skipped", None
+
+    # Check current permission to avoid redundant calls. All local filtering is done above,
+    # so this is the first point that may hit the network; in dry-run the per-user REST
+    # fallback is skipped since the outcome is only logged.
+    needs_update = True
+    if collaborators is not None:
+        if collaborators.get(login.lower()) == gh_perm:
+            needs_update = False
+    elif not dry_run:
+        try:
+            current_perm = get_repo().get_collaborator_permission(login)
+            # get_collaborator_permission returns 'admin','write','read' or None
+            if current_perm:
+                # Map to our three levels
+                norm = _GH_API_TO_OUR_PERM.get(current_perm, current_perm)
+                if norm == gh_perm:
+                    needs_update = False
+        except GithubException:
+            # User not a collaborator yet
+            pass
+
+    if not needs_update:
+        logger.info("%s already has %s on %s", login, gh_perm, full_name)
+        return "unchanged", login
+
+    if dry_run:
+        logger.info("Dry-run: would add/update %s on %s with %s (from %s)", login, full_name, gh_perm, email)
+        return "dry_run", login
+
+    return "grant", login
+
+
+def _grant(repo: Repository, full_name: str, login: str, gh_perm: str) -> str:
+    try:
+        repo.add_to_collaborators(login, permission=gh_perm)
+        logger.info("Granted %s to %s on %s", gh_perm, login, full_name)
+    except GithubException as ge:
+        logger.error("Failed to add %s to %s with %s: %s", login, full_name, gh_perm, ge)
+        return "failed"
+    return "granted"
 
 
 def apply_permissions(
@@ -30,6 +166,7 @@ def apply_permissions(
     mapping_csv: Optional[str] = None,
     default_missing: Optional[str] = None,
     dry_run: bool = False,
+    max_workers: int = 10,
 ) -> None:
     """
     Apply repo permissions in GitHub based on effective per-user permissions CSV.
@@ -41,82 +178,81 @@ def apply_permissions(
     - mapping_csv: optional CSV mapping email -> github_login
     - default_missing: optional default GitHub login to use when email is not in mapping (e.g., a fallback service account); if not provided, such rows are skipped with a warning.
     - dry_run: if True, no changes are made, only logs
+    - max_workers: number of concurrent REST permission checks, used only when the GraphQL collaborator
+      listing fails; grants are always sent one at a time
     """
     gh = Github(github_token)
+    # PyGithub clients are not safe to share across threads, so workers that need the
+    # REST fallback get their own client; the main thread's gh performs all writes.
+    local = threading.local()
+
+    def thread_repo(full_name: str) -> Repository:
+        if getattr(local, "gh", None) is None:
+            local.gh = Github(github_token)
+        if getattr(local, "full_name", None) != full_name:
+            local.repo = local.gh.get_repo(full_name, lazy=True)
+            local.full_name = full_name
+        return local.repo
+
     email_to_login = load_email_to_login(mapping_csv)
 
-    rows = list(read_csv(effective_csv))
+    (pk_i, rs_i, email_i, perm_i), csv_rows = read_csv(
+        effective_csv, "project_key", "repo_slug", "email", "permission"
+    )
+    rows = list(csv_rows)
     logger.info("Loaded %d effective permission rows", len(rows))
 
-    # Group rows by target repo
-    by_repo: Dict[str, List[Dict[str, str]]] = {}
+    # Group rows by Bitbucket repo, normalizing email and permission once per row
+    by_bb_repo: Dict[Tuple[str, str], List[_Entry]] = {}
     for r in rows:
-        project_key = r.get("project_key", "")
-        repo_slug = r.get("repo_slug", "")
-        tgt = GithubTarget.from_project_repo(org, project_key, repo_slug)
-        full = f"{tgt.org}/{tgt.repo}"
-        by_repo.setdefault(full, []).append(r)
-
-    for full_name, entries in sorted(by_repo.items()):
-        logger.info("Processing repo %s with %d entries", full_name, len(entries))
-        try:
-            repo = gh.get_repo(full_name)
-        except GithubException as e:
-            logger.error("Cannot access repo %s: %s", full_name, e)
+        email = r[email_i].strip().lower()
+        bb_perm = r[perm_i] or "REPO_READ"
+        gh_perm = BITBUCKET_TO_GITHUB.get(bb_perm)
+        if not gh_perm:
+            logger.warning("Unknown Bitbucket permission %s for %s; skipping", bb_perm, email)
             continue
+        by_bb_repo.setdefault((r[pk_i], r[rs_i]), []).append(_Entry(email, gh_perm))
 
-        for e in entries:
-            email = (e.get("email") or "").strip().lower()
-            bb_perm = e.get("permission") or "REPO_READ"
-            gh_perm = BITBUCKET_TO_GITHUB.get(bb_perm)
-            if not gh_perm:
-                logger.warning("Unknown Bitbucket permission %s for %s; skipping", bb_perm, email)
-                continue
+    # Resolve the GitHub target once per repo rather than once per row
+    by_repo: Dict[str, List[_Entry]] = {}
+    for (project_key, repo_slug), entries in by_bb_repo.items():
+        tgt = GithubTarget.from_project_repo(org, project_key, repo_slug)
+        full = f"{tgt.org}/{tgt.repo}"
+        by_repo.setdefault(full, []).extend(entries)
 
-            login = email_to_login.get(email)
-            if not login:
-                if default_missing:
-                    login = default_missing
-                    logger.warning("No mapping for %s; using default login %s", email, login)
-                else:
-                    logger.warning("No mapping for %s; skipping", email)
-                    continue
-
-            # Check current permission to avoid redundant calls
-            needs_update = True
-            current_perm = None
+    # One pool for the whole run, so each worker keeps its client and connection across repos.
+    # Threads are only started once a repo actually needs the REST fallback.
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        for full_name, entries in sorted(by_repo.items()):
+            logger.info("Processing repo %s with %d entries", full_name, len(entries))
             try:
-                current_perm = repo.get_collaborator_permission(login)
-                # get_collaborator_permission returns 'admin','write','read' or None
-                if current_perm:
-                    # Map to our three levels
-                    norm = {
-                        "admin": "admin",
-                        "write": "push",
-                        "triage": "triage",
-                        "maintain": "maintain",
-                        "read": "pull",
-                    }.get(current_perm, current_perm)
-                    if norm == gh_perm:
-                        needs_update = False
-            except GithubException:
-                # User not a collaborator yet
-                pass
-
-            if not needs_update:
-                logger.info("%s already has %s on %s", login, gh_perm, full_name)
+                repo = gh.get_repo(full_name)
+            except GithubException as e:
+                logger.error("Cannot access repo %s: %s", full_name, e)
                 continue
 
-            if dry_run:
-                logger.info("Dry-run: would add/update %s on %s with %s (from %s)", login, full_name, gh_perm, email)
-                continue
+            owner, _, name = full_name.partition("/")
+            collaborators = _fetch_repo_collaborators(gh, owner, name)
 
-            try:
-                repo.add_to_collaborators(login, permission=gh_perm)
-                logger.info("Granted %s to %s on %s", gh_perm, login, full_name)
-            except GithubException as ge:
-                logger.error("Failed to add %s to %s with %s: %s", login, full_name, gh_perm, ge)
-                continue
+            get_repo = functools.partial(thread_repo, full_name)
+
+            def check(e: _Entry) -> Tuple[str, Optional[str]]:
+                return _check_one(get_repo, full_name, collaborators, e, email_to_login, default_missing, dry_run)
+
+            # With the GraphQL listing (or in dry-run) checks are local lookups and run inline;
+            # only per-user REST checks go to the pool. Grants are sent serially from this thread
+            # so PyGithub's spacing between writes holds and GitHub's secondary rate limits are not tripped.
+            checks = ex.map(check, entries) if collaborators is None and not dry_run else map(check, entries)
+            outcomes: Dict[str, int] = {}
+            for e, (outcome, login) in zip(entries, checks):
+                if outcome == "grant":
+                    outcome = _grant(repo, full_name, login, e.gh_perm)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            logger.info(
+                "Finished repo %s: %s",
+                full_name,
+                ", ".join(f"{k}={v}" for k, v in sorted(outcomes.items())) or "no entries",
+            )
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -142,6 +278,7 @@ def build_arg_parser() -> argparse.ArgumentParser:
     p.add_argument("--mapping-csv", help="CSV mapping: email,github_login")
     p.add_argument("--default-missing", help="Default github login if email not found in mapping (optional)")
     p.add_argument("--dry-run", action="store_true", help="Do not make changes, only log")
+    p.add_argument("--workers", type=int, default=10, help="Concurrent REST permission checks when GraphQL is unavailable (grants are sent one at a time)")
     return p
 
 
@@ -155,6 +292,7 @@ def main(argv: Optional[List[str]] = None) -> None:
         mapping_csv=args.mapping_csv,
         default_missing=args.default_missing,
         dry_run=args.dry_run,
+        max_workers=args.workers,
     )
 
 
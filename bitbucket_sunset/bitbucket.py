@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import logging
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, Generator, Iterable, List, Optional
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +22,8 @@ class BitbucketConfig:
     password: Optional[str] = None
     token: Optional[str] = None  # personal access token
     verify_ssl: bool = True
-    rate_limit_sleep: float = 0.0  # seconds to sleep between requests
+    rate_limit_sleep: float = 0.0  # minimum seconds between requests, across all threads
+    max_workers: int = 8  # threads the caller will issue requests from; sizes the connection pool
 
 
 class BitbucketDC:
@@ -30,47 +36,112 @@ class BitbucketDC:
         if not cfg.base_url:
             raise ValueError("Bitbucket base_url is required")
         self.cfg = cfg
-        self.session = requests.Session()
-        if cfg.token:
-            self.session.headers.update({"Authorization": f"Bearer {cfg.token}"})
-        elif cfg.username and cfg.password:
-            self.session.auth = (cfg.username, cfg.password)
-        self.session.verify = cfg.verify_ssl
-        self.session.headers.setdefault("Accept", "application/json")
+        # requests.Session is not thread-safe, so each thread gets its own
+        self._local = threading.local()
+        # One adapter shared by all per-thread sessions so keep-alive connections are pooled
+        # across workers; idempotent GETs are retried on throttling and transient server errors.
+        # Size the pool for the deepest nesting so connections are not discarded. A thread holds
+        # one connection, and each _paginate past its first page adds a prefetch thread holding
+        # another. Paginations nest two deep: extract walks iter_projects -> iter_repos on the
+        # caller's thread, and a worker's permission listing can call get_user, whose 404 path
+        # paginates the /users search. That is 3 connections for the caller and 3 per worker.
+        pool_size = 3 * cfg.max_workers + 3
+        self._adapter = HTTPAdapter(
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+                raise_on_status=False,
+            ),
+        )
+        # get_user results keyed by slug/name; the same user shows up on many repos and groups.
+        # Futures let concurrent lookups of the same user wait for a single request.
+        self._user_cache: Dict[str, Future] = {}
+        self._user_cache_lock = threading.Lock()
+        # rate_limit_sleep is enforced across all worker and prefetch threads, not per thread
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
 
         # Normalize base URL without trailing slash
         self.base = cfg.base_url.rstrip("/")
 
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._new_session()
+            self._local.session = session
+        return session
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount("https://", self._adapter)
+        session.mount("http://", self._adapter)
+        if self.cfg.token:
+            session.headers.update({"Authorization": f"Bearer {self.cfg.token}"})
+        elif self.cfg.username and self.cfg.password:
+            session.auth = (self.cfg.username, self.cfg.password)
+        session.verify = self.cfg.verify_ssl
+        session.headers.setdefault("Accept", "application/json")
+        return session
+
+    def _throttle(self) -> None:
+        # Reserve the next request slot under the lock, then sleep outside it
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(self._next_request_at, now + self.cfg.rate_limit_sleep)
+            self._next_request_at = slot + self.cfg.rate_limit_sleep
+        time.sleep(slot - now)
+
     def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         if self.cfg.rate_limit_sleep:
-            time.sleep(self.cfg.rate_limit_sleep)
+            self._throttle()
         url = f"{self.base}{path}"
         resp = self.session.get(url, params=params)
         if resp.status_code >= 400:
             logger.error("Bitbucket GET %s failed: %s - %s", url, resp.status_code, resp.text)
             resp.raise_for_status()
-        return resp.json()
+        # orjson parses large pages several times faster than the stdlib json used by resp.json()
+        return orjson.loads(resp.content)
 
     def _paginate(self, path: str, params: Optional[Dict[str, Any]] = None) -> Generator[Dict[str, Any], None, None]:
         if params is None:
             params = {}
         limit = params.get("limit", 1000)
+
+        def page_params(start: int) -> Dict[str, Any]:
+            page = dict(params)
+            page.update({"limit": limit, "start": start})
+            return page
+
+        # The next page is requested before the current one is yielded, so the network
+        # round trip overlaps with the consumer. The prefetch thread is only started once
+        # a second page is needed; most listings fit in one page.
+        prefetch: Optional[ThreadPoolExecutor] = None
         start = params.get("start", 0)
-        while True:
-            page_params = dict(params)
-            page_params.update({"limit": limit, "start": start})
-            data = self._get(path, page_params)
-            values = data.get("values", [])
-            for v in values:
-                yield v
-            if data.get("isLastPage", False):
-                break
-            next_start = data.get("nextPageStart")
-            if next_start is None:
-                # Fallback in case API doesn't return nextPageStart
-                start += len(values)
-            else:
-                start = next_start
+        data = self._get(path, page_params(start))
+        try:
+            while True:
+                values = data.get("values", [])
+                if data.get("isLastPage", False):
+                    yield from values
+                    return
+                next_start = data.get("nextPageStart")
+                if next_start is None:
+                    # Fallback in case API doesn't return nextPageStart
+                    start += len(values)
+                else:
+                    start = next_start
+                if prefetch is None:
+                    prefetch = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bitbucket-prefetch")
+                next_page = prefetch.submit(self._get, path, page_params(start))
+                yield from values
+                data = next_page.result()
+        finally:
+            if prefetch is not None:
+                prefetch.shutdown(wait=True, cancel_futures=True)
 
     # Projects and repos
     def iter_projects(self, project_keys: Optional[Iterable[str]] = None) -> Generator[Dict[str, Any], None, None]:
@@ -111,18 +182,43 @@ class BitbucketDC:
 
     # User details (for email)
     def get_user(self, user_slug_or_name: str) -> Optional[Dict[str, Any]]:
+        with self._user_cache_lock:
+            fut = self._user_cache.get(user_slug_or_name)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._user_cache[user_slug_or_name] = fut
+        if owner:
+            try:
+                user, cacheable = self._fetch_user(user_slug_or_name)
+            except BaseException as e:
+                user, cacheable = None, False
+                fut.set_exception(e)
+            else:
+                fut.set_result(user)
+            if not cacheable:
+                # Only found users and 404 misses are cached; waiters share this failed attempt,
+                # later calls retry
+                with self._user_cache_lock:
+                    self._user_cache.pop(user_slug_or_name, None)
+        return fut.result()
+
+    def _fetch_user(self, user_slug_or_name: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Returns (user, cacheable); cacheable is False when the lookup failed for a reason other than 404."""
         # Try user by slug
         try:
-            return self._get(f"/rest/api/1.0/users/{user_slug_or_name}")
+            return self._get(f"/rest/api/1.0/users/{user_slug_or_name}"), True
         except requests.HTTPError as e:
+            cacheable = False
             if e.response is not None and e.response.status_code == 404:
                 # Try search endpoint as fallback
                 users = list(self._paginate("/rest/api/1.0/users", params={"filter": user_slug_or_name, "limit": 50}))
                 for u in users:
                     if u.get("name") == user_slug_or_name or u.get("slug") == user_slug_or_name:
-                        return u
+                        return u, True
+                cacheable = True
             logger.warning("Unable to fetch user details for %s: %s", user_slug_or_name, e)
-            return None
+            return None, cacheable
 
     @staticmethod
     def extract_email(user_obj: Dict[str, Any]) -> Optional[str]:
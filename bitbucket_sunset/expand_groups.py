@@ -18,76 +18,76 @@ def expand(
     dry_run: bool = False,
 ) -> None:
     # Load direct user permissions
-    direct: List[Dict[str, str]] = list(read_csv(user_perm_csv))
+    (u_pk, u_rs, u_email, u_perm, u_principal), user_rows = read_csv(
+        user_perm_csv, "project_key", "repo_slug", "email", "permission", "principal"
+    )
+    direct: List[List[str]] = list(user_rows)
 
     # Load group permissions
-    group_perms: List[Dict[str, str]] = list(read_csv(group_perm_csv))
+    (g_pk, g_rs, g_principal, g_perm), group_rows = read_csv(
+        group_perm_csv, "project_key", "repo_slug", "principal", "permission"
+    )
+    group_perms: List[List[str]] = list(group_rows)
 
-    # Load group members: group -> list of {user,email}
-    members_by_group: Dict[str, List[Dict[str, str]]] = defaultdict(list)
-    for row in read_csv(group_members_csv):
-        g = row.get("group", "")
+    # Load group members: group -> stripped member emails (groups stay listed even if no member has one)
+    (m_group, m_email), member_rows = read_csv(group_members_csv, "group", "email")
+    group_to_emails: Dict[str, List[str]] = defaultdict(list)
+    for row in member_rows:
+        g = row[m_group]
         if g:
-            members_by_group[g].append(row)
+            emails = group_to_emails[g]
+            email = row[m_email].strip()
+            if email:
+                emails.append(email)
 
-    # Build effective permissions per (project, repo, email)
-    effective: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+    # Build effective permissions per (project, repo, email) -> (permission, source, source_principal)
+    effective: Dict[Tuple[str, str, str], Tuple[str, str, str]] = {}
 
     # Apply direct user permissions first
     for row in direct:
-        email = (row.get("email") or "").strip()
+        email = row[u_email].strip()
         if not email:
             logger.warning("Skipping direct user row without email: %s", row)
             continue
-        key = (row.get("project_key", ""), row.get("repo_slug", ""), email)
+        key = (row[u_pk], row[u_rs], email)
         current = effective.get(key)
-        perm = row.get("permission") or ""
-        prev = current.get("permission") if current else None
-        new_perm = max_perm(prev, perm)
-        effective[key] = {
-            "project_key": key[0],
-            "repo_slug": key[1],
-            "email": email,
-            "permission": new_perm,
-            "source": "user",
-            "source_principal": row.get("principal", ""),
-        }
+        effective[key] = (max_perm(current[0] if current else None, row[u_perm]), "user", row[u_principal])
 
     # Apply group-derived permissions
     for row in group_perms:
-        group = row.get("principal") or ""
-        perm = row.get("permission") or ""
+        group = row[g_principal]
+        perm = row[g_perm]
         if not group:
             continue
-        members = members_by_group.get(group, [])
-        if not members:
+        emails = group_to_emails.get(group)
+        if emails is None:
             logger.warning("Group %s has repo permissions but no members were found in group_members.csv", group)
-        for m in members:
-            email = (m.get("email") or "").strip()
-            if not email:
-                continue
-            key = (row.get("project_key", ""), row.get("repo_slug", ""), email)
+            continue
+        pk, rs = row[g_pk], row[g_rs]
+        for email in emails:
+            key = (pk, rs, email)
             current = effective.get(key)
-            prev = current.get("permission") if current else None
-            new_perm = max_perm(prev, perm)
-            effective[key] = {
-                "project_key": key[0],
-                "repo_slug": key[1],
-                "email": email,
-                "permission": new_perm,
-                "source": "group",
-                "source_principal": group,
-            }
+            effective[key] = (max_perm(current[0] if current else None, perm), "group", group)
 
-    out_rows = list(effective.values())
-    out_rows.sort(key=lambda r: (r["project_key"], r["repo_slug"], r["email"]))
     if dry_run:
-        logger.info("Dry-run: would write %d effective permission rows", len(out_rows))
+        logger.info("Dry-run: would write %d effective permission rows", len(effective))
         return
 
+    # Keys are unique, so sorting items orders rows by (project_key, repo_slug, email).
+    # Row dicts are built lazily while writing rather than held in a list.
     write_csv(
         output_csv,
-        out_rows,
+        (
+            {
+                "project_key": pk,
+                "repo_slug": rs,
+                "email": email,
+                "permission": perm,
+                "source": source,
+                "source_principal": principal,
+            }
+            for (pk, rs, email), (perm, source, principal) in sorted(effective.items())
+        ),
         ["project_key", "repo_slug", "email", "permission", "source", "source_principal"],
     )
 
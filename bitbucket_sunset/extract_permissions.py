@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import argparse
 import logging
-from typing import Dict, Iterable, List, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
 from .bitbucket import BitbucketConfig, BitbucketDC
 from .utils import write_csv
@@ -11,6 +13,63 @@ from .utils import write_csv
 logger = logging.getLogger(__name__)
 
 
+def _collect_repo_perms(
+    bb: BitbucketDC, pkey: str, rslug: str
+) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
+    """Collect direct user and group permission rows for a single repo."""
+    user_rows: List[Dict[str, object]] = []
+    group_rows: List[Dict[str, object]] = []
+    # Users
+    for u in bb.iter_repo_user_perms(pkey, rslug):
+        # u example: { "user": {"name":"jsmith","emailAddress":"..."}, "permission": "REPO_WRITE" }
+        user = u.get("user", {})
+        email = BitbucketDC.extract_email(user)
+        if not email:
+            # Try fetch user details if missing email
+            name_or_slug = user.get("slug") or user.get("name")
+            details = bb.get_user(name_or_slug) if name_or_slug else None
+            email = BitbucketDC.extract_email(details or {})
+        row = {
+            "project_key": pkey,
+            "repo_slug": rslug,
+            "principal_type": "user",
+            "principal": user.get("name") or user.get("slug") or "",
+            "email": email or "",
+            "permission": u.get("permission"),
+        }
+        user_rows.append(row)
+    # Groups
+    for g in bb.iter_repo_group_perms(pkey, rslug):
+        group = g.get("group", {})
+        row = {
+            "project_key": pkey,
+            "repo_slug": rslug,
+            "principal_type": "group",
+            "principal": group.get("name") or group.get("slug") or "",
+            "permission": g.get("permission"),
+        }
+        group_rows.append(row)
+    return user_rows, group_rows
+
+
+def _collect_group_members(bb: BitbucketDC, gname: str) -> List[Dict[str, object]]:
+    """Collect member rows for a single group, resolving missing emails via get_user."""
+    member_rows: List[Dict[str, object]] = []
+    for m in bb.iter_group_members(gname):
+        email = BitbucketDC.extract_email(m)
+        if not email:
+            details = bb.get_user(m.get("slug") or m.get("name")) if m else None
+            email = BitbucketDC.extract_email(details or {})
+        member_rows.append(
+            {
+                "group": gname,
+                "user": m.get("name") or m.get("slug") or "",
+                "email": email or "",
+            }
+        )
+    return member_rows
+
+
 def extract(
     base_url: str,
     username: Optional[str],
@@ -22,6 +81,7 @@ def extract(
     repo_slugs: Optional[List[str]] = None,
     rate_limit_sleep: float = 0.0,
     dry_run: bool = False,
+    max_workers: int = 8,
 ) -> None:
     cfg = BitbucketConfig(
         base_url=base_url,
@@ -30,70 +90,46 @@ def extract(
         token=token,
         verify_ssl=verify_ssl,
         rate_limit_sleep=rate_limit_sleep,
+        max_workers=max_workers,
     )
     bb = BitbucketDC(cfg)
 
-    projects = list(bb.iter_projects(project_keys))
-    logger.info("Found %d projects", len(projects))
-
     user_rows: List[Dict[str, object]] = []
     group_rows: List[Dict[str, object]] = []
     member_rows: List[Dict[str, object]] = []
-
-    for p in projects:
-        pkey = p.get("key")
-        repos = list(bb.iter_repos(pkey, repo_slugs))
-        logger.info("Project %s: %d repos", pkey, len(repos))
-        for r in repos:
-            rslug = r.get("slug")
-            # Users
-            for u in bb.iter_repo_user_perms(pkey, rslug):
-                # u example: { "user": {"name":"jsmith","emailAddress":"..."}, "permission": "REPO_WRITE" }
-                user = u.get("user", {})
-                email = BitbucketDC.extract_email(user)
-                if not email:
-                    # Try fetch user details if missing email
-                    name_or_slug = user.get("slug") or user.get("name")
-                    details = bb.get_user(name_or_slug) if name_or_slug else None
-                    email = BitbucketDC.extract_email(details or {})
-                row = {
-                    "project_key": pkey,
-                    "repo_slug": rslug,
-                    "principal_type": "user",
-                    "principal": user.get("name") or user.get("slug") or "",
-                    "email": email or "",
-                    "permission": u.get("permission"),
-                }
-                user_rows.append(row)
-            # Groups
-            for g in bb.iter_repo_group_perms(pkey, rslug):
-                group = g.get("group", {})
-                row = {
-                    "project_key": pkey,
-                    "repo_slug": rslug,
-                    "principal_type": "group",
-                    "principal": group.get("name") or group.get("slug") or "",
-                    "permission": g.get("permission"),
-                }
-                group_rows.append(row)
-
-        # Also export group members at project scope for referenced groups
-    # Get unique groups from group_rows
-    unique_groups = sorted({row["principal"] for row in group_rows if row.get("principal")})
-    logger.info("Exporting members for %d groups", len(unique_groups))
-    for gname in unique_groups:
-        for m in bb.iter_group_members(gname):
-            email = BitbucketDC.extract_email(m)
-            if not email:
-                details = bb.get_user(m.get("slug") or m.get("name")) if m else None
-                email = BitbucketDC.extract_email(details or {})
-            member_rows.append(
-                {
-                    "group": gname,
-                    "user": m.get("name") or m.get("slug") or "",
-                    "email": email or "",
-                }
-            )
+    unique_groups: set[str] = set()
+
+    def merge(fut: Future) -> None:
+        users_chunk, groups_chunk = fut.result()
+        user_rows.extend(users_chunk)
+        for row in groups_chunk:
+            group_rows.append(row)
+            if row["principal"]:
+                unique_groups.add(row["principal"])
+
+    # Repo permission listings and group member listings are independent, fetch them concurrently.
+    # Projects and repos are streamed into the pool; at most 2 * max_workers repos are in flight,
+    # and results are merged oldest-first so row order matches the listing order.
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        pending: Deque[Future] = deque()
+        project_count = 0
+        for p in bb.iter_projects(project_keys):
+            project_count += 1
+            pkey = p.get("key")
+            repo_count = 0
+            for r in bb.iter_repos(pkey, repo_slugs):
+                repo_count += 1
+                pending.append(ex.submit(_collect_repo_perms, bb, pkey, r.get("slug")))
+                if len(pending) >= 2 * max_workers:
+                    merge(pending.popleft())
+            logger.info("Project %s: %d repos", pkey, repo_count)
+        logger.info("Found %d projects", project_count)
+        while pending:
+            merge(pending.popleft())
+
+        logger.info("Exporting members for %d groups", len(unique_groups))
+        for members_chunk in ex.map(lambda g: _collect_group_members(bb, g), sorted(unique_groups)):
+            member_rows.extend(members_chunk)
 
     if dry_run:
         logger.info("Dry-run: would write %d user permission rows, %d group permission rows, %d group members",
@@ -143,11 +179,12 @@ def build_arg_parser() -> argparse.ArgumentParser:
     auth.add_argument("--username", help="Bitbucket username")
     p.add_argument("--password", help="Bitbucket password (used with --username)")
     p.add_argument("--no-verify-ssl", action="store_true", help="Disable SSL verification")
-    p.add_argument("--rate-limit-sleep", type=float, default=0.0, help="Sleep seconds between requests")
+    p.add_argument("--rate-limit-sleep", type=float, default=0.0, help="Minimum seconds between requests, shared by all workers")
     p.add_argument("--output-dir", default="out", help="Directory to write CSV files")
     p.add_argument("--project", action="append", dest="projects", help="Limit to specific project keys (repeatable)")
     p.add_argument("--repo", action="append", dest="repos", help="Limit to specific repo slugs (repeatable)")
     p.add_argument("--dry-run", action="store_true", help="Do not write files, just log actions")
+    p.add_argument("--workers", type=int, default=8, help="Concurrent Bitbucket requests")
     return p
 
 
@@ -165,6 +202,7 @@ def main(argv: Optional[List[str]] = None) -> None:
         repo_slugs=args.repos,
         rate_limit_sleep=args.rate_limit_sleep,
         dry_run=args.dry_run,
+        max_workers=args.workers,
     )
 
 
@@ -4,12 +4,13 @@ import csv
 import logging
 import os
 from dataclasses import dataclass
-from typing import Dict, Iterable, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
 PERM_ORDER = ["REPO_READ", "REPO_WRITE", "REPO_ADMIN"]
+_PERM_RANK = {p: i for i, p in enumerate(PERM_ORDER)}
 BITBUCKET_TO_GITHUB = {
     "REPO_READ": "pull",
     "REPO_WRITE": "push",
@@ -23,26 +24,59 @@ def ensure_dir(path: str) -> None:
 
 def write_csv(path: str, rows: Iterable[Dict[str, object]], fieldnames: Iterable[str]) -> None:
     ensure_dir(os.path.dirname(path) or ".")
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=list(fieldnames))
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
+    fields = list(fieldnames)
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        # Missing keys become empty cells, like DictWriter's default restval
+        writer.writerows([r.get(k, "") for k in fields] for r in rows)
 
 
-def read_csv(path: str) -> Iterable[Dict[str, str]]:
-    with open(path, "r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            yield {k: v for k, v in row.items()}
+def read_csv(path: str, *columns: str) -> Tuple[Tuple[int, ...], Iterator[List[str]]]:
+    """
+    Open a CSV file and return (indices, rows), where indices are the positions of the
+    requested columns in the header.
+
+    Rows are plain lists in header order, indexed with those positions instead of building
+    a dict per row. Blank lines are skipped and short rows are padded with empty strings.
+    Raises ValueError if a requested column is missing; the file is closed on that path,
+    otherwise once rows is exhausted.
+    """
+    f = open(path, "r", newline="", encoding="utf-8")
+    try:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        indices = column_indices(header, *columns)
+    except BaseException:
+        f.close()
+        raise
+    width = len(header)
+
+    def rows() -> Iterator[List[str]]:
+        with f:
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < width:
+                    row.extend([""] * (width - len(row)))
+                yield row
+
+    return indices, rows()
+
+
+def column_indices(header: List[str], *names: str) -> Tuple[int, ...]:
+    missing = [n for n in names if n not in header]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+    return tuple(header.index(n) for n in names)
 
 
 def max_perm(current: Optional[str], new_perm: str) -> str:
     if current is None:
         return new_perm
     try:
-        return max((current, new_perm), key=lambda p: PERM_ORDER.index(p))
-    except ValueError:
+        return new_perm if _PERM_RANK[new_perm] > _PERM_RANK[current] else current
+    except KeyError:
         # unknown permission, preserve current
         logger.warning("Unknown permission encountered: %s", new_perm)
         return current